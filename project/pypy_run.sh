@@ -0,0 +1,15 @@
+#!/usr/bin/env sh
+# Run the regex-heavy PDF extraction diagnostics under PyPy when available.
+# PyMuPDF must be installed for PyPy too (pypy3 -m pip install -r requirements.txt);
+# otherwise this falls back to CPython.
+
+cd "$(dirname "$0")" || exit 1
+
+if command -v pypy3 >/dev/null 2>&1 && pypy3 -c "import fitz" >/dev/null 2>&1; then
+    PYTHON=pypy3
+else
+    echo "pypy3 with PyMuPDF not found, falling back to python" >&2
+    PYTHON=python
+fi
+
+exec "$PYTHON" -m tests.pdf_extraction_fix "$@"
@@ -49,10 +49,8 @@ class DocumentParser:
         # Method 2: Blocks
         try:
             blocks = page.get_text("blocks")
-            text2 = ""
-            for block in blocks:
-                if len(block) > 4:  # Text block
-                    text2 += block[4] + "\n"
+            # Text blocks carry their text at index 4
+            text2 = "".join(block[4] + "\n" for block in blocks if len(block) > 4)
             methods.append(("blocks", text2, len(text2)))
             logger.info(f"Blocks text: {len(text2)} chars")
         except Exception as e:
@@ -63,12 +61,11 @@ class DocumentParser:
             text_dict = page.get_text("dict")
             text3 = ""
             if text_dict and 'blocks' in text_dict:
-                for block in text_dict['blocks']:
-                    if 'lines' in block:
-                        for line in block['lines']:
-                            for span in line.get('spans', []):
-                                text3 += span.get('text', '') + " "
-                            text3 += "\n"
+                text3 = "".join(
+                    "".join(span.get('text', '') + " " for span in line.get('spans', [])) + "\n"
+                    for block in text_dict['blocks'] if 'lines' in block
+                    for line in block['lines']
+                )
             methods.append(("dict", text3, len(text3)))
             logger.info(f"Dict text: {len(text3)} chars")
         except Exception as e:
@@ -85,11 +82,11 @@ class DocumentParser:
                         lines_dict[line_key] = []
                     lines_dict[line_key].append((x0, word_text))
                 
-                text4 = ""
+                line_texts = []
                 for y_coord in sorted(lines_dict.keys()):
                     line_words = sorted(lines_dict[y_coord], key=lambda item: item[0])
-                    line_text = " ".join([w for _, w in line_words])
-                    text4 += line_text + "\n"
+                    line_texts.append(" ".join([w for _, w in line_words]) + "\n")
+                text4 = "".join(line_texts)
                 
                 methods.append(("spatial", text4, len(text4)))
                 logger.info(f"Spatial text: {len(text4)} chars")
@@ -1190,9 +1187,7 @@ class DocumentParser:
                 img = self._get_page_image(page, self.dpi)
                 ocr_results = self.ocr_reader.readtext(img, detail=1)
                 # Convert OCR results to text
-                text = ""
-                for result in ocr_results:
-                    text += result[1] + " "
+                text = "".join(result[1] + " " for result in ocr_results)
                 page_units = self._parse_text_simple(text)
             else:
                 logger.info(f"Page {page_num + 1} is machine-readable.")
@@ -22,7 +22,10 @@ class StorageManager:
         self.db_path = db_path
         self.qdrant_path = qdrant_path
         
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # "file:" URIs (e.g. shared in-memory databases in tests) skip the data directory
+        self.use_uri = db_path.startswith("file:")
+        if not self.use_uri:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
         os.makedirs(qdrant_path, exist_ok=True)
         
         self._init_database()
@@ -35,7 +38,7 @@ class StorageManager:
     
     def _init_database(self):
         """Initialize SQLite database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, uri=self.use_uri) as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -72,6 +75,18 @@ class StorageManager:
                 )
             """)
             
+            # One row per unit within a document; inserts upsert into it
+            # instead of leaving duplicates for quick_fix_duplicates.py
+            try:
+                cursor.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS ux_units_doc_unit
+                    ON units(document_id, unit_number) WHERE unit_number <> ''
+                """)
+                self.units_unique = True
+            except sqlite3.IntegrityError:
+                logger.warning("Duplicate units found; run tests/quick_fix_duplicates.py to enable upserts")
+                self.units_unique = False
+            
             conn.commit()
     
     def _init_qdrant_collection(self):
@@ -99,7 +114,7 @@ class StorageManager:
     
     def store_document(self, document_data: Dict) -> int:
         """Store document in database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, uri=self.use_uri) as conn:
             cursor = conn.cursor()
             
             # Insert document
@@ -125,14 +140,32 @@ class StorageManager:
             # Delete existing units
             cursor.execute("DELETE FROM units WHERE document_id = ?", (document_id,))
             
-            # Insert units
+            # Insert units; when a unit repeats, the whole row with the higher
+            # rent (then total amount; later rows win ties) replaces the stored one
+            insert_sql = """
+                INSERT INTO units 
+                (document_id, unit_number, unit_type, area_sqft, tenant_name,
+                 rent, total_amount, lease_start, lease_end, move_in_date, move_out_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """
+            if self.units_unique:
+                insert_sql += """
+                ON CONFLICT(document_id, unit_number) WHERE unit_number <> '' DO UPDATE SET
+                    unit_type = excluded.unit_type,
+                    area_sqft = excluded.area_sqft,
+                    tenant_name = excluded.tenant_name,
+                    rent = excluded.rent,
+                    total_amount = excluded.total_amount,
+                    lease_start = excluded.lease_start,
+                    lease_end = excluded.lease_end,
+                    move_in_date = excluded.move_in_date,
+                    move_out_date = excluded.move_out_date
+                WHERE (COALESCE(excluded.rent, 0), COALESCE(excluded.total_amount, 0))
+                   >= (COALESCE(units.rent, 0), COALESCE(units.total_amount, 0))
+                """
+            
             for unit in document_data['units']:
-                cursor.execute("""
-                    INSERT INTO units 
-                    (document_id, unit_number, unit_type, area_sqft, tenant_name,
-                     rent, total_amount, lease_start, lease_end, move_in_date, move_out_date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+                cursor.execute(insert_sql, (
                     document_id,
                     unit.get('unit', ''),
                     unit.get('unit_type', ''),
@@ -146,6 +179,17 @@ class StorageManager:
                     unit.get('move_out_date') or None
                 ))
             
+            # Summarize from the stored rows, since repeated units were merged above
+            cursor.execute("""
+                UPDATE documents
+                SET total_units = (SELECT COUNT(*) FROM units WHERE document_id = :id),
+                    occupied_units = (SELECT COUNT(*) FROM units WHERE document_id = :id AND unit_type = 'Occupied'),
+                    vacant_units = (SELECT COUNT(*) FROM units WHERE document_id = :id AND unit_type = 'Vacant'),
+                    total_rent = (SELECT COALESCE(SUM(rent), 0) FROM units WHERE document_id = :id),
+                    total_area = (SELECT COALESCE(SUM(area_sqft), 0) FROM units WHERE document_id = :id)
+                WHERE id = :id
+            """, {'id': document_id})
+            
             conn.commit()
             return document_id
     
@@ -238,7 +282,7 @@ class StorageManager:
     
     def get_property_summary(self) -> Dict:
         """Get property statistics"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, uri=self.use_uri) as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -265,7 +309,7 @@ class StorageManager:
     
     def query_units(self, filters: Dict = None) -> List[Dict]:
         """Query units with filters"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, uri=self.use_uri) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -3,10 +3,35 @@ Comprehensive PDF diagnostic to find where the actual data is located
 """
 
 import fitz
+import heapq
 import re
 import os
 from pathlib import Path
 
+try:
+    from lxml import html as _lxml_html
+except ImportError:
+    _lxml_html = None
+
+# Expected units: 101-128 and 201-227 (55 total)
+_EXPECTED_UNITS = set(range(101, 129)) | set(range(201, 228))
+_UNIT_RE = re.compile(r'\b(1[0-2][0-8]|20[0-7]|21[0-9]|22[0-7])\b')
+_TAG_RE = re.compile(r'<[^>]+>')
+
+# Default dict flags minus image decoding (== TEXTFLAGS_TEXT); scanned pages get
+# OCR'd anyway. The shared TextPage fixes these flags for every format below
+_TEXTPAGE_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+def _html_to_text(markup: str) -> str:
+    """Strip tags from PyMuPDF html/xhtml output and collapse whitespace."""
+    if not markup.strip():
+        return ""
+    if _lxml_html is not None:
+        text = _lxml_html.fromstring(markup).text_content()
+    else:
+        text = _TAG_RE.sub(' ', markup)
+    return ' '.join(text.split())
+
 def comprehensive_pdf_diagnosis(pdf_path: str):
     """Complete diagnosis of PDF structure and content."""
     
@@ -50,92 +75,108 @@ def comprehensive_pdf_diagnosis(pdf_path: str):
         # Test ALL extraction methods
         extraction_results = {}
         
+        # Parse the page content once and share it across all text formats
+        try:
+            textpage = page.get_textpage(flags=_TEXTPAGE_FLAGS)
+        except Exception as e:
+            print(f"📝 TextPage creation: FAILED - {e}")
+            textpage = None
+        
         # Method 1: Basic text
         try:
-            text1 = page.get_text("text")
+            text1 = page.get_text("text", textpage=textpage)
             extraction_results["text"] = text1
             print(f"📝 Text extraction: {len(text1)} chars")
         except Exception as e:
             print(f"📝 Text extraction: FAILED - {e}")
         
-        # Method 2: Blocks
-        try:
-            blocks = page.get_text("blocks")
-            text2 = "\n".join([block[4] for block in blocks if len(block) > 4])
-            extraction_results["blocks"] = text2
-            print(f"🧱 Blocks extraction: {len(blocks)} blocks, {len(text2)} chars")
-        except Exception as e:
-            print(f"🧱 Blocks extraction: FAILED - {e}")
+        # Well-formed pages return everything via plain text; the remaining
+        # formats are only needed as fallbacks for hard pages
+        skip_remaining = len(extraction_results.get("text", "")) > 1000
+        if skip_remaining:
+            print(f"⏩ Text extraction sufficient, skipping blocks/words/dict/rawdict/html/xhtml")
+        else:
+            # Method 2: Blocks
+            try:
+                blocks = page.get_text("blocks", textpage=textpage)
+                text2 = "\n".join([block[4] for block in blocks if len(block) > 4])
+                extraction_results["blocks"] = text2
+                print(f"🧱 Blocks extraction: {len(blocks)} blocks, {len(text2)} chars")
+            except Exception as e:
+                print(f"🧱 Blocks extraction: FAILED - {e}")
         
-        # Method 3: Words
-        try:
-            words = page.get_text("words")
-            text3 = " ".join([word[4] for word in words])
-            extraction_results["words"] = text3
-            print(f"📖 Words extraction: {len(words)} words, {len(text3)} chars")
+            # Method 3: Words
+            try:
+                words = page.get_text("words", textpage=textpage)
+                text3 = " ".join([word[4] for word in words])
+                extraction_results["words"] = text3
+                print(f"📖 Words extraction: {len(words)} words, {len(text3)} chars")
             
-            # Show first 10 words with positions
-            if words:
-                print(f"  First 10 words:")
-                for i, word in enumerate(words[:10]):
-                    x0, y0, x1, y1, text, *_ = word
-                    print(f"    {i+1}: '{text}' at ({x0:.1f}, {y0:.1f})")
-        except Exception as e:
-            print(f"📖 Words extraction: FAILED - {e}")
+                # Show first 10 words with positions
+                if words:
+                    print(f"  First 10 words:")
+                    for i, word in enumerate(words[:10]):
+                        x0, y0, x1, y1, text, *_ = word
+                        print(f"    {i+1}: '{text}' at ({x0:.1f}, {y0:.1f})")
+            except Exception as e:
+                print(f"📖 Words extraction: FAILED - {e}")
         
-        # Method 4: Dict
-        try:
-            dict_result = page.get_text("dict")
-            if dict_result and 'blocks' in dict_result:
-                dict_text = ""
-                for block in dict_result['blocks']:
-                    if 'lines' in block:
-                        for line in block['lines']:
-                            for span in line.get('spans', []):
-                                dict_text += span.get('text', '') + " "
-                            dict_text += "\n"
-                extraction_results["dict"] = dict_text
-                print(f"📚 Dict extraction: {len(dict_text)} chars")
-        except Exception as e:
-            print(f"📚 Dict extraction: FAILED - {e}")
+            # Method 4: Dict
+            try:
+                dict_result = page.get_text("dict", textpage=textpage)
+                if dict_result and 'blocks' in dict_result:
+                    parts = []
+                    for block in dict_result['blocks']:
+                        if 'lines' in block:
+                            for line in block['lines']:
+                                for span in line.get('spans', []):
+                                    parts.append(span.get('text', ''))
+                                    parts.append(" ")
+                                parts.append("\n")
+                    dict_text = "".join(parts)
+                    extraction_results["dict"] = dict_text
+                    print(f"📚 Dict extraction: {len(dict_text)} chars")
+            except Exception as e:
+                print(f"📚 Dict extraction: FAILED - {e}")
         
-        # Method 5: Raw dict
-        try:
-            raw_dict = page.get_text("rawdict")
-            if raw_dict and 'blocks' in raw_dict:
-                raw_text = ""
-                for block in raw_dict['blocks']:
-                    if 'lines' in block:
-                        for line in block['lines']:
-                            for span in line.get('spans', []):
-                                raw_text += span.get('text', '') + " "
-                            raw_text += "\n"
-                extraction_results["rawdict"] = raw_text
-                print(f"🔧 Raw dict extraction: {len(raw_text)} chars")
-        except Exception as e:
-            print(f"🔧 Raw dict extraction: FAILED - {e}")
+            # Method 5: Raw dict
+            try:
+                raw_dict = page.get_text("rawdict", textpage=textpage)
+                if raw_dict and 'blocks' in raw_dict:
+                    parts = []
+                    for block in raw_dict['blocks']:
+                        if 'lines' in block:
+                            for line in block['lines']:
+                                for span in line.get('spans', []):
+                                    parts.append(span.get('text', ''))
+                                    parts.append(" ")
+                                parts.append("\n")
+                    raw_text = "".join(parts)
+                    extraction_results["rawdict"] = raw_text
+                    print(f"🔧 Raw dict extraction: {len(raw_text)} chars")
+            except Exception as e:
+                print(f"🔧 Raw dict extraction: FAILED - {e}")
         
-        # Method 6: HTML
-        try:
-            html = page.get_text("html")
-            # Extract text from HTML
-            import re
-            html_text = re.sub(r'<[^>]+>', ' ', html)
-            html_text = re.sub(r'\s+', ' ', html_text).strip()
-            extraction_results["html"] = html_text
-            print(f"🌐 HTML extraction: {len(html_text)} chars")
-        except Exception as e:
-            print(f"🌐 HTML extraction: FAILED - {e}")
+            # Method 6: HTML
+            try:
+                html = page.get_text("html", textpage=textpage)
+                html_text = _html_to_text(html)
+                extraction_results["html"] = html_text
+                print(f"🌐 HTML extraction: {len(html_text)} chars")
+            except Exception as e:
+                print(f"🌐 HTML extraction: FAILED - {e}")
         
-        # Method 7: XHTML
-        try:
-            xhtml = page.get_text("xhtml")
-            xhtml_text = re.sub(r'<[^>]+>', ' ', xhtml)
-            xhtml_text = re.sub(r'\s+', ' ', xhtml_text).strip()
-            extraction_results["xhtml"] = xhtml_text
-            print(f"📰 XHTML extraction: {len(xhtml_text)} chars")
-        except Exception as e:
-            print(f"📰 XHTML extraction: FAILED - {e}")
+            # Method 7: XHTML
+            try:
+                xhtml = page.get_text("xhtml", textpage=textpage)
+                xhtml_text = _html_to_text(xhtml)
+                extraction_results["xhtml"] = xhtml_text
+                print(f"📰 XHTML extraction: {len(xhtml_text)} chars")
+            except Exception as e:
+                print(f"📰 XHTML extraction: FAILED - {e}")
+        
+        # Release the shared text page before table detection
+        textpage = None
         
         # Method 8: Try table extraction if available
         try:
@@ -149,7 +190,7 @@ def comprehensive_pdf_diagnosis(pdf_path: str):
                         try:
                             df = table.to_pandas()
                             for _, row in df.iterrows():
-                                row_text = "\t".join([str(cell) for cell in row if str(cell) != 'nan'])
+                                row_text = "\t".join(s for cell in row if (s := str(cell)) != 'nan')
                                 table_text += row_text + "\n"
                         except Exception as e:
                             print(f"    Table extraction failed: {e}")
@@ -176,18 +217,11 @@ def comprehensive_pdf_diagnosis(pdf_path: str):
         # Test for unit patterns in best text
         if best_text and len(best_text) > 50:
             # Look for expected units
-            expected_units = list(range(101, 129)) + list(range(201, 228))
-            unit_pattern = r'\b(1[0-2][0-8]|20[0-7]|21[0-9]|22[0-7])\b'
-            
-            found_units = set()
-            for match in re.finditer(unit_pattern, best_text):
-                unit_num = int(match.group(1))
-                if unit_num in expected_units:
-                    found_units.add(unit_num)
+            found_units = {int(m.group(1)) for m in _UNIT_RE.finditer(best_text)} & _EXPECTED_UNITS
             
             print(f"🎯 UNITS FOUND: {len(found_units)}/55 ({len(found_units)/55*100:.1f}%)")
             if found_units:
-                sample_units = sorted(list(found_units))[:20]
+                sample_units = heapq.nsmallest(20, found_units)
                 print(f"   Sample units: {sample_units}")
             
             # Look for other patterns
@@ -217,8 +251,8 @@ def comprehensive_pdf_diagnosis(pdf_path: str):
             # If no text found, check if this might be an image-based page
             print(f"🔍 CHECKING IF PAGE IS IMAGE-BASED...")
             try:
-                # Convert to image and try OCR
-                zoom = 2.0
+                # Convert to image and try OCR; 1.5x is enough for the image-only probe
+                zoom = 1.5
                 mat = fitz.Matrix(zoom, zoom)
                 pix = page.get_pixmap(matrix=mat)
                 
@@ -242,11 +276,7 @@ def comprehensive_pdf_diagnosis(pdf_path: str):
                         print(f"   OCR sample: {repr(ocr_text[:200])}")
                         
                         # Test OCR for units
-                        ocr_units = set()
-                        for match in re.finditer(unit_pattern, ocr_text):
-                            unit_num = int(match.group(1))
-                            if unit_num in expected_units:
-                                ocr_units.add(unit_num)
+                        ocr_units = {int(m.group(1)) for m in _UNIT_RE.finditer(ocr_text)} & _EXPECTED_UNITS
                         
                         if ocr_units:
                             print(f"   🎯 OCR found {len(ocr_units)} units!")
@@ -0,0 +1,26 @@
+"""
+Pytest configuration: tests marked slow (OCR model loading) only run with --runslow
+"""
+
+import pytest
+
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", default=False,
+                     help="run slow tests that load the OCR models")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: loads OCR models; needs --runslow to run")
+
+@pytest.fixture(scope="session")
+def ocr_reader():
+    """EasyOCR Reader loaded once per session instead of once per test"""
+    from test_ocr_extraction import _get_reader
+    return _get_reader()
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="needs --runslow to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
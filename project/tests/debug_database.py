@@ -12,6 +12,14 @@ def debug_database():
     db_path = "data/documents.db"
     
     with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        
+        # Read-path tuning: WAL, relaxed fsync, in-memory temp tables, 256 MB mmap
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        
         cursor = conn.cursor()
         
         # Check documents table
@@ -20,7 +28,7 @@ def debug_database():
         documents = cursor.fetchall()
         
         for doc in documents:
-            print(f"ID: {doc[0]}, File: {doc[1]}, Units: {doc[2]}, Occupied: {doc[3]}, Vacant: {doc[4]}, Rent: ${doc[5]:.2f}")
+            print(f"ID: {doc['id']}, File: {doc['file_name']}, Units: {doc['total_units']}, Occupied: {doc['occupied_units']}, Vacant: {doc['vacant_units']}, Rent: ${doc['total_rent']:.2f}")
         
         print(f"\nTotal documents in database: {len(documents)}")
         
@@ -40,7 +48,7 @@ def debug_database():
         
         print("\n=== UNITS BY DOCUMENT ===")
         for row in cursor.fetchall():
-            print(f"Document: {row[0]}, Units: {row[1]}, Rent: ${row[2] or 0:.2f}")
+            print(f"Document: {row['file_name']}, Units: {row['unit_count']}, Rent: ${row['total_rent'] or 0:.2f}")
         
         # Check for duplicates
         cursor.execute("""
@@ -56,8 +64,8 @@ def debug_database():
         duplicates = cursor.fetchall()
         if duplicates:
             print(f"\n=== DUPLICATE UNITS (Top 10) ===")
-            for unit, count in duplicates:
-                print(f"Unit {unit}: {count} duplicates")
+            for row in duplicates:
+                print(f"Unit {row['unit_number']}: {row['count']} duplicates")
         else:
             print("\n=== NO DUPLICATE UNITS FOUND ===")
 
@@ -5,13 +5,46 @@ Fixes the fundamental text extraction issue causing 0 units from machine-readabl
 
 import os
 import sys
+import heapq
 import re
 import fitz
+from collections import defaultdict
 from typing import List, Dict
 
 # Add src to path
 sys.path.insert(0, 'src')
 
+# Plain text this long already holds the data; skip the heavier extraction methods
+GOOD_ENOUGH_THRESHOLD = 2000
+
+# Unit detection patterns
+_BUILDING_RE = re.compile(r'(?:01-|02-)(\d{3})')
+_UNIT_RANGE_RE = re.compile(r'\b([12]\d{2})\b')
+_CONTEXT_RE = re.compile(r'\b([12]\d{2})[^\S\n]+(?:MBL|Occupied|Vacant|rent)', re.IGNORECASE)
+_TOKEN_RE = re.compile(r'\b\d{3}\b')
+
+# Field extraction patterns
+_RENT_RE = re.compile(r'\$?\s*([1-5]\d{3}(?:\.\d{2})?)')
+
+# Patterns reported by analyze_pdf_content_directly
+_PATTERNS_TO_TEST = [
+    (re.compile(r'\b([12]\d{2})\b', re.IGNORECASE), "Standard 3-digit (1XX, 2XX)"),
+    (re.compile(r'\b(0[12]-\d{3})\b', re.IGNORECASE), "Building prefix (01-XXX, 02-XXX)"),
+    (re.compile(r'\b([345]\d{2})\b', re.IGNORECASE), "Other 3-digit (3XX, 4XX, 5XX)"),
+    (re.compile(r'\b(\d{3})\b', re.IGNORECASE), "Any 3-digit number"),
+    (re.compile(r'Unit\s*(\d+)', re.IGNORECASE), "Unit keyword"),
+    (re.compile(r'(\d+)\s+(?:MBL|Occupied|Vacant)', re.IGNORECASE), "Number before keywords"),
+]
+
+_CONTENT_INDICATORS = [
+    ("rent", re.compile(r'\$\s*[\d,]+', re.IGNORECASE), "Currency amounts"),
+    ("dates", re.compile(r'\d{1,2}/\d{1,2}/\d{2,4}', re.IGNORECASE), "Date patterns"),
+    ("names", re.compile(r'\b[A-Z][a-z]+,\s*[A-Z][a-z]+', re.IGNORECASE), "Names (Last, First)"),
+    ("sqft", re.compile(r'\d+\s*sq', re.IGNORECASE), "Square footage"),
+    ("occupied", re.compile(r'\boccupied\b', re.IGNORECASE), "Occupied status"),
+    ("vacant", re.compile(r'\bvacant\b', re.IGNORECASE), "Vacant status"),
+]
+
 def analyze_pdf_content_directly():
     """Directly analyze what's in the PDFs to understand extraction failure."""
     
@@ -33,108 +66,75 @@ def analyze_pdf_content_directly():
         print("-" * 40)
         
         try:
-            doc = fitz.open(pdf_path)
-            page = doc[0]  # First page
-            
-            # Test all extraction methods
-            extraction_methods = []
-            
-            # Method 1: Direct text
-            try:
-                direct_text = page.get_text("text")
-                extraction_methods.append(("direct", direct_text))
-                print(f"✅ Direct text: {len(direct_text)} chars")
-            except Exception as e:
-                print(f"❌ Direct text failed: {e}")
-            
-            # Method 2: Blocks
-            try:
-                blocks = page.get_text("blocks")
-                block_text = ""
-                for block in blocks:
-                    if len(block) > 4:
-                        block_text += block[4] + "\n"
-                extraction_methods.append(("blocks", block_text))
-                print(f"✅ Blocks text: {len(block_text)} chars")
-            except Exception as e:
-                print(f"❌ Blocks text failed: {e}")
-            
-            # Method 3: Dict
-            try:
-                text_dict = page.get_text("dict")
-                dict_text = ""
-                if text_dict and 'blocks' in text_dict:
-                    for block in text_dict['blocks']:
-                        if 'lines' in block:
-                            for line in block['lines']:
-                                for span in line.get('spans', []):
-                                    span_text = span.get('text', '')
-                                    if span_text.strip():
-                                        dict_text += span_text + " "
-                                dict_text += "\n"
-                extraction_methods.append(("dict", dict_text))
-                print(f"✅ Dict text: {len(dict_text)} chars")
-            except Exception as e:
-                print(f"❌ Dict text failed: {e}")
-            
-            # Method 4: Words (spatial)
-            try:
-                words = page.get_text("words")
-                words_text = " ".join([word[4] for word in words if len(word) > 4])
-                extraction_methods.append(("words", words_text))
-                print(f"✅ Words text: {len(words_text)} chars")
-            except Exception as e:
-                print(f"❌ Words text failed: {e}")
-            
-            # Choose the longest extraction
-            if extraction_methods:
-                best_method = max(extraction_methods, key=lambda x: len(x[1]))
-                best_text = best_method[1]
-                
-                print(f"\n🎯 Best method: {best_method[0]} with {len(best_text)} characters")
-                
-                # Show sample text
-                print(f"\n📝 First 500 characters:")
-                print("'" + best_text[:500] + "'")
-                
-                # Test unit pattern matching
-                print(f"\n🔍 Unit pattern analysis:")
+            with fitz.open(pdf_path) as doc:
+                page = doc[0]  # First page
                 
-                # Look for various unit patterns
-                patterns_to_test = [
-                    (r'\b([12]\d{2})\b', "Standard 3-digit (1XX, 2XX)"),
-                    (r'\b(0[12]-\d{3})\b', "Building prefix (01-XXX, 02-XXX)"),
-                    (r'\b([345]\d{2})\b', "Other 3-digit (3XX, 4XX, 5XX)"),
-                    (r'\b(\d{3})\b', "Any 3-digit number"),
-                    (r'Unit\s*(\d+)', "Unit keyword"),
-                    (r'(\d+)\s+(?:MBL|Occupied|Vacant)', "Number before keywords"),
-                ]
+                # Test all extraction methods
+                extraction_methods = []
                 
-                for pattern, description in patterns_to_test:
-                    matches = re.findall(pattern, best_text, re.IGNORECASE)
-                    unique_matches = sorted(set(matches))
-                    print(f"   {description}: {len(unique_matches)} matches")
-                    if unique_matches:
-                        sample = unique_matches[:10]  # Show first 10
-                        print(f"      Sample: {sample}")
+                # Method 1: Direct text
+                try:
+                    direct_text = page.get_text("text")
+                    extraction_methods.append(("direct", direct_text))
+                    print(f"✅ Direct text: {len(direct_text)} chars")
+                except Exception as e:
+                    print(f"❌ Direct text failed: {e}")
                 
-                # Look for specific content that might indicate the document structure
-                print(f"\n📋 Content indicators:")
-                content_indicators = [
-                    ("rent", r'\$\s*[\d,]+', "Currency amounts"),
-                    ("dates", r'\d{1,2}/\d{1,2}/\d{2,4}', "Date patterns"),
-                    ("names", r'\b[A-Z][a-z]+,\s*[A-Z][a-z]+', "Names (Last, First)"),
-                    ("sqft", r'\d+\s*sq', "Square footage"),
-                    ("occupied", r'\boccupied\b', "Occupied status"),
-                    ("vacant", r'\bvacant\b', "Vacant status"),
-                ]
+                # The heavier parses only help on short output from likely-scanned pages
+                best_length = max((len(t) for _, t in extraction_methods), default=0)
+                if best_length > GOOD_ENOUGH_THRESHOLD or page.get_fonts():
+                    print(f"⏩ Skipping blocks/words extraction")
+                else:
+                    # Method 2: Blocks (a "dict" parse would only rebuild the direct
+                    # text span by span, at the cost of one Python dict per span)
+                    try:
+                        blocks = page.get_text("blocks")
+                        block_text = "\n".join(b[4] for b in blocks if len(b) > 4)
+                        extraction_methods.append(("blocks", block_text))
+                        print(f"✅ Blocks text: {len(block_text)} chars")
+                    except Exception as e:
+                        print(f"❌ Blocks text failed: {e}")
+                    
+                    # Method 3: Words (spatial), only when blocks came up empty too
+                    if max((len(t) for _, t in extraction_methods), default=0) < 50:
+                        try:
+                            words = page.get_text("words")
+                            words_text = " ".join([word[4] for word in words if len(word) > 4])
+                            extraction_methods.append(("words", words_text))
+                            print(f"✅ Words text: {len(words_text)} chars")
+                        except Exception as e:
+                            print(f"❌ Words text failed: {e}")
                 
-                for name, pattern, description in content_indicators:
-                    matches = re.findall(pattern, best_text, re.IGNORECASE)
-                    print(f"   {description}: {len(matches)} found")
-            
-            doc.close()
+                # Choose the longest extraction
+                if extraction_methods:
+                    best_method = max(extraction_methods, key=lambda x: len(x[1]))
+                    best_text = best_method[1]
+                    
+                    print(f"\n🎯 Best method: {best_method[0]} with {len(best_text)} characters")
+                    
+                    # Show sample text
+                    print(f"\n📝 First 500 characters:")
+                    print("'" + best_text[:500] + "'")
+                    
+                    # Test unit pattern matching
+                    print(f"\n🔍 Unit pattern analysis:")
+                    
+                    # Look for various unit patterns
+                    for pattern, description in _PATTERNS_TO_TEST:
+                        unique_matches = {m.group(1) for m in pattern.finditer(best_text)}
+                        print(f"   {description}: {len(unique_matches)} matches")
+                        if unique_matches:
+                            sample = heapq.nsmallest(10, unique_matches)  # Show first 10
+                            print(f"      Sample: {sample}")
+                    
+                    # Look for specific content that might indicate the document structure
+                    print(f"\n📋 Content indicators:")
+                    for name, pattern, description in _CONTENT_INDICATORS:
+                        matches = pattern.findall(best_text)
+                        print(f"   {description}: {len(matches)} found")
             
+            # Release MuPDF's global object cache between files
+            fitz.TOOLS.store_shrink(100)
         except Exception as e:
             print(f"❌ Analysis failed for {pdf_path}: {e}")
 
@@ -146,10 +146,41 @@ def create_targeted_extraction_fix():
     
     # Create a custom extraction method that works for these specific PDFs
     fix_code = '''
+from collections import defaultdict
+from datetime import datetime as _DT
+
+# Module-level compiled patterns used by extract_units_targeted_fix
+_BUILDING_RE = re.compile(r'(?:01-|02-)(\\d{3})')
+_UNIT_RANGE_RE = re.compile(r'\\b([12]\\d{2})\\b')
+_LINE_START_RE = re.compile(r'^\\s*([12]\\d{2})\\s')
+_TARGETED_CONTEXT_RES = [
+    re.compile(r'([12]\\d{2})\\s+(?:MBL|Occupied|Vacant|rent)', re.IGNORECASE),
+    re.compile(r'([12]\\d{2})\\s+\\w+AC\\d+', re.IGNORECASE),
+    re.compile(r'Unit\\s*([12]\\d{2})', re.IGNORECASE),
+]
+_RENT_RE = re.compile(r'\\$?\\s*([1-5]\\d{3}(?:\\.\\d{2})?)')
+_DATE_SPLIT_RE = re.compile(r'\\b(\\d{1,2})/(\\d{1,2})/(\\d{2,4})\\b')
+_AREA_RE = re.compile(r'\\b([5-9]\\d{2}|1\\d{3})\\b')
+_OCCUPIED_RE = re.compile(r'\\bOccupied\\b', re.IGNORECASE)
+_VACANT_RE = re.compile(r'\\bVacant\\b', re.IGNORECASE)
+_TOKEN_RE = re.compile(r'\\b\\d{3}\\b')
+
+def _iso_date(match) -> str:
+    """Convert a month/day/year match from _DATE_SPLIT_RE to YYYY-MM-DD."""
+    month, day, year = map(int, match.groups())
+    year_digits = len(match.group(3))
+    if year_digits == 2:
+        year += 2000 if year < 69 else 1900  # same pivot as strptime's %y
+    elif year_digits != 4:
+        raise ValueError(f"Unsupported year: {match.group(3)}")
+    _DT(year, month, day)  # validates month/day ranges
+    return f'{year:04d}-{month:02d}-{day:02d}'
+
 def extract_units_targeted_fix(self, text: str) -> List[Dict]:
     """Targeted fix for the specific PDF extraction issues."""
     
     processed_text = self._comprehensive_text_cleaning(text)
+    lines = processed_text.splitlines()
     
     print(f"DEBUG: Processing {len(processed_text)} chars")
     print(f"DEBUG: Sample text: {repr(processed_text[:200])}")
@@ -158,8 +189,7 @@ def extract_units_targeted_fix(self, text: str) -> List[Dict]:
     found_units = set()
     
     # Pattern 1: Look for 01-XXX and 02-XXX format (building prefixes)
-    building_pattern = r'(?:01-|02-)(\d{3})'
-    building_matches = re.findall(building_pattern, processed_text)
+    building_matches = _BUILDING_RE.findall(processed_text)
     for match in building_matches:
         unit_num = int(match)
         if 100 <= unit_num <= 999:
@@ -167,8 +197,7 @@ def extract_units_targeted_fix(self, text: str) -> List[Dict]:
     print(f"DEBUG: Building pattern found: {len(building_matches)} units")
     
     # Pattern 2: Look for standalone 3-digit numbers in valid ranges
-    standalone_pattern = r'\\b([12]\\d{2})\\b'
-    standalone_matches = re.findall(standalone_pattern, processed_text)
+    standalone_matches = _UNIT_RANGE_RE.findall(processed_text)
     for match in standalone_matches:
         unit_num = int(match)
         # Be more specific about valid ranges
@@ -177,24 +206,17 @@ def extract_units_targeted_fix(self, text: str) -> List[Dict]:
     print(f"DEBUG: Standalone pattern found: {len(standalone_matches)} potential units")
     
     # Pattern 3: Look for units in table-like structures
-    lines = processed_text.split('\\n')
     for line in lines:
         # Look for lines that start with unit numbers
-        line_match = re.match(r'^\\s*([12]\\d{2})\\s', line)
+        line_match = _LINE_START_RE.match(line)
         if line_match:
             unit_num = int(line_match.group(1))
             if (101 <= unit_num <= 128) or (201 <= unit_num <= 227):
                 found_units.add(unit_num)
     
     # Pattern 4: Look for specific context patterns
-    context_patterns = [
-        r'([12]\\d{2})\\s+(?:MBL|Occupied|Vacant|rent)',
-        r'([12]\\d{2})\\s+\\w+AC\\d+',
-        r'Unit\\s*([12]\\d{2})',
-    ]
-    
-    for pattern in context_patterns:
-        context_matches = re.findall(pattern, processed_text, re.IGNORECASE)
+    for pattern in _TARGETED_CONTEXT_RES:
+        context_matches = pattern.findall(processed_text)
         for match in context_matches:
             unit_num = int(match)
             if (101 <= unit_num <= 128) or (201 <= unit_num <= 227):
@@ -203,16 +225,19 @@ def extract_units_targeted_fix(self, text: str) -> List[Dict]:
     print(f"DEBUG: Total unique units found: {len(found_units)}")
     print(f"DEBUG: Units: {sorted(list(found_units))}")
     
+    # Index lines by the 3-digit tokens they contain (one pass over the text)
+    lines_by_token = defaultdict(list)
+    for line in lines:
+        for token in set(_TOKEN_RE.findall(line)):
+            lines_by_token[token].append(line)
+    
     # Create unit records for found units
     unit_records = []
     for unit_num in sorted(found_units):
         unit_str = str(unit_num)
         
         # Find context for this unit
-        unit_context = ""
-        for line in processed_text.split('\\n'):
-            if unit_str in line:
-                unit_context += line + " "
+        unit_context = ' '.join(lines_by_token.get(unit_str, ()))
         
         # Create unit record
         unit_data = {
@@ -231,7 +256,7 @@ def extract_units_targeted_fix(self, text: str) -> List[Dict]:
         # Extract data from context
         if unit_context:
             # Extract rent
-            rent_matches = re.findall(r'\\$?\\s*([1-5]\\d{3}(?:\\.\\d{2})?)', unit_context)
+            rent_matches = _RENT_RE.findall(unit_context)
             for rent_match in rent_matches:
                 try:
                     rent_val = float(rent_match.replace(',', ''))
@@ -243,7 +268,7 @@ def extract_units_targeted_fix(self, text: str) -> List[Dict]:
                     pass
             
             # Extract area
-            area_matches = re.findall(r'\\b([5-9]\\d{2}|1\\d{3})\\b', unit_context)
+            area_matches = _AREA_RE.findall(unit_context)
             for area_match in area_matches:
                 try:
                     area_val = int(area_match)
@@ -254,33 +279,21 @@ def extract_units_targeted_fix(self, text: str) -> List[Dict]:
                     pass
             
             # Extract status
-            if re.search(r'\\bOccupied\\b', unit_context, re.IGNORECASE):
+            if _OCCUPIED_RE.search(unit_context):
                 unit_data['unit_type'] = 'Occupied'
-            elif re.search(r'\\bVacant\\b', unit_context, re.IGNORECASE):
+            elif _VACANT_RE.search(unit_context):
                 unit_data['unit_type'] = 'Vacant'
             
             # Extract dates
-            date_matches = re.findall(r'\\b(\\d{1,2}/\\d{1,2}/\\d{2,4})\\b', unit_context)
+            date_matches = list(_DATE_SPLIT_RE.finditer(unit_context))
             if date_matches:
                 try:
-                    from datetime import datetime
-                    if len(date_matches) >= 1:
-                        date1 = date_matches[0]
-                        if len(date1.split('/')[-1]) == 4:
-                            date_obj = datetime.strptime(date1, '%m/%d/%Y')
-                        else:
-                            date_obj = datetime.strptime(date1, '%m/%d/%y')
-                        unit_data['lease_start'] = date_obj.strftime('%Y-%m-%d')
-                        unit_data['move_in_date'] = date_obj.strftime('%Y-%m-%d')
+                    unit_data['lease_start'] = _iso_date(date_matches[0])
+                    unit_data['move_in_date'] = unit_data['lease_start']
                     
                     if len(date_matches) >= 2:
-                        date2 = date_matches[1]
-                        if len(date2.split('/')[-1]) == 4:
-                            date_obj = datetime.strptime(date2, '%m/%d/%Y')
-                        else:
-                            date_obj = datetime.strptime(date2, '%m/%d/%y')
-                        unit_data['lease_end'] = date_obj.strftime('%Y-%m-%d')
-                except:
+                        unit_data['lease_end'] = _iso_date(date_matches[1])
+                except ValueError:
                     pass
         
         # Validate unit data
@@ -313,46 +326,47 @@ def apply_extraction_fix():
             """Fixed extraction method for both PDFs."""
             
             processed_text = self._comprehensive_text_cleaning(text)
+            lines = processed_text.splitlines()
             
             # Look for units with multiple patterns
             found_units = set()
             
             # Pattern 1: Building prefixes (01-XXX, 02-XXX)
-            building_matches = re.findall(r'(?:01-|02-)(\d{3})', processed_text)
+            building_matches = _BUILDING_RE.findall(processed_text)
             for match in building_matches:
                 unit_num = int(match)
                 if 100 <= unit_num <= 999:
                     found_units.add(unit_num)
             
             # Pattern 2: Valid unit ranges
-            range_matches = re.findall(r'\b([12]\d{2})\b', processed_text)
+            range_matches = _UNIT_RANGE_RE.findall(processed_text)
             for match in range_matches:
                 unit_num = int(match)
                 # Specific valid ranges for our documents
                 if (101 <= unit_num <= 128) or (201 <= unit_num <= 227):
                     found_units.add(unit_num)
             
-            # Pattern 3: Context-based detection
-            lines = processed_text.split('\n')
-            for line in lines:
-                line_match = re.search(r'\b([12]\d{2})\s+(?:MBL|Occupied|Vacant|rent)', line, re.IGNORECASE)
-                if line_match:
-                    unit_num = int(line_match.group(1))
-                    if (101 <= unit_num <= 128) or (201 <= unit_num <= 227):
-                        found_units.add(unit_num)
+            # Pattern 3: Context-based detection (single scan, matches never span lines)
+            for line_match in _CONTEXT_RE.finditer(processed_text):
+                unit_num = int(line_match.group(1))
+                if (101 <= unit_num <= 128) or (201 <= unit_num <= 227):
+                    found_units.add(unit_num)
             
             print(f"Fixed extraction found {len(found_units)} units: {sorted(list(found_units))}")
             
+            # Map each 3-digit token to the lines it appears on in one pass
+            contexts = defaultdict(list)
+            for line in lines:
+                for token in set(_TOKEN_RE.findall(line)):
+                    contexts[token].append(line)
+            
             # Create unit records
             unit_records = []
             for unit_num in sorted(found_units):
                 unit_str = str(unit_num)
                 
                 # Find context for this unit
-                unit_context = ""
-                for line in processed_text.split('\n'):
-                    if unit_str in line:
-                        unit_context += line + " "
+                unit_context = ' '.join(contexts.get(unit_str, []))
                 
                 # Create basic unit record
                 unit_data = {
@@ -371,7 +385,7 @@ def apply_extraction_fix():
                 # Try to extract real data from context
                 if unit_context:
                     # Extract rent
-                    rent_matches = re.findall(r'\$?\s*([1-5]\d{3}(?:\.\d{2})?)', unit_context)
+                    rent_matches = _RENT_RE.findall(unit_context)
                     for rent_match in rent_matches:
                         try:
                             rent_val = float(rent_match.replace(',', ''))
@@ -10,9 +10,25 @@ def fix_duplicate_units():
     
     db_path = "data/documents.db"
     
-    with sqlite3.connect(db_path) as conn:
+    # Autocommit mode so transactions are managed explicitly below
+    with sqlite3.connect(db_path, isolation_level=None) as conn:
         cursor = conn.cursor()
         
+        # WAL + NORMAL sync avoids a full fsync on commit; a 200 MB page cache
+        # and in-memory temp storage keep the dedup sorts off disk
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size = -200000")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        
+        # Once the unique index exists, inserts upsert and there are no
+        # duplicates to scrub; the empty-unit cleanup and summaries still run
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'index' AND name = 'ux_units_doc_unit'
+        """)
+        units_unique = cursor.fetchone() is not None
+        
         print("=== BEFORE CLEANUP ===")
         cursor.execute("SELECT COUNT(*) FROM units")
         before_count = cursor.fetchone()[0]
@@ -22,32 +38,58 @@ def fix_duplicate_units():
         print("\n=== REMOVING DUPLICATES ===")
         
         # Strategy: For each unit_number + document_id combination,
-        # keep only the record with the highest rent (most complete data)
+        # keep only the record with the highest rent (most complete data).
+        # The partition index lets each EXISTS probe be a single B-tree descent.
         cursor.execute("""
-            DELETE FROM units 
-            WHERE id NOT IN (
-                SELECT id FROM (
-                    SELECT id, 
-                           ROW_NUMBER() OVER (
-                               PARTITION BY document_id, unit_number 
-                               ORDER BY rent DESC, total_amount DESC, id DESC
-                           ) as rn
-                    FROM units
-                    WHERE unit_number != ''
-                ) ranked 
-                WHERE rn = 1
-            ) AND unit_number != ''
+            CREATE INDEX IF NOT EXISTS ix_units_partition
+            ON units(document_id, unit_number, rent DESC, total_amount DESC, id DESC)
         """)
         
-        duplicates_removed = cursor.rowcount
+        # Delete one document at a time so each write transaction (and the
+        # lock it holds) stays small
+        if units_unique:
+            print("✅ Unique unit index present - skipping duplicate scan")
+            doc_ids = []
+        else:
+            cursor.execute("SELECT DISTINCT document_id FROM units")
+            doc_ids = [row[0] for row in cursor.fetchall()]
+        
+        duplicates_removed = 0
+        for doc_id in doc_ids:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                DELETE FROM units AS u
+                WHERE u.document_id IS ?
+                AND u.unit_number != ''
+                AND EXISTS (
+                    SELECT 1 FROM units v
+                    WHERE v.document_id IS u.document_id
+                    AND v.unit_number = u.unit_number
+                    AND (COALESCE(v.rent, 0), COALESCE(v.total_amount, 0), v.id)
+                      > (COALESCE(u.rent, 0), COALESCE(u.total_amount, 0), u.id)
+                )
+            """, (doc_id,))
+            duplicates_removed += cursor.rowcount
+            cursor.execute("COMMIT")
+        
         print(f"Removed {duplicates_removed} duplicate records")
         
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # Also remove any units with empty unit numbers
         cursor.execute("DELETE FROM units WHERE unit_number = '' OR unit_number IS NULL")
         empty_removed = cursor.rowcount
         print(f"Removed {empty_removed} empty unit records")
         
-        conn.commit()
+        # Enforce uniqueness from now on so new inserts upsert instead of
+        # duplicating (created here because it fails while duplicates remain)
+        try:
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_units_doc_unit
+                ON units(document_id, unit_number) WHERE unit_number <> ''
+            """)
+        except sqlite3.IntegrityError as e:
+            print(f"⚠️  Could not add unique unit index: {e}")
         
         print("\n=== AFTER CLEANUP ===")
         cursor.execute("SELECT COUNT(*) FROM units")
@@ -57,75 +99,77 @@ def fix_duplicate_units():
         # Update document summaries
         print("\n=== UPDATING DOCUMENT SUMMARIES ===")
         
-        # Update document statistics based on cleaned units
+        # Update document statistics based on cleaned units, aggregating
+        # units in a single pass instead of one correlated scan per column
         cursor.execute("""
-            UPDATE documents 
+            WITH agg AS (
+                SELECT d.id AS document_id,
+                       COUNT(u.id) AS n,
+                       COALESCE(SUM(u.unit_type = 'Occupied'), 0) AS occ,
+                       COALESCE(SUM(u.unit_type = 'Vacant'), 0) AS vac,
+                       COALESCE(SUM(u.rent), 0) AS tr,
+                       COALESCE(SUM(u.area_sqft), 0) AS ta
+                FROM documents d
+                LEFT JOIN units u ON u.document_id = d.id
+                GROUP BY d.id
+            )
+            UPDATE documents
             SET 
-                total_units = (
-                    SELECT COUNT(*) 
-                    FROM units 
-                    WHERE units.document_id = documents.id
-                ),
-                occupied_units = (
-                    SELECT COUNT(*) 
-                    FROM units 
-                    WHERE units.document_id = documents.id 
-                    AND units.unit_type = 'Occupied'
-                ),
-                vacant_units = (
-                    SELECT COUNT(*) 
-                    FROM units 
-                    WHERE units.document_id = documents.id 
-                    AND units.unit_type = 'Vacant'
-                ),
-                total_rent = (
-                    SELECT COALESCE(SUM(rent), 0)
-                    FROM units 
-                    WHERE units.document_id = documents.id
-                ),
-                total_area = (
-                    SELECT COALESCE(SUM(area_sqft), 0)
-                    FROM units 
-                    WHERE units.document_id = documents.id
-                )
+                total_units = agg.n,
+                occupied_units = agg.occ,
+                vacant_units = agg.vac,
+                total_rent = agg.tr,
+                total_area = agg.ta
+            FROM agg
+            WHERE agg.document_id = documents.id
         """)
         
+        cursor.execute("COMMIT")
+        
+        # Refresh planner statistics for the new index
+        cursor.execute("ANALYZE")
+        
         print("✅ Updated document statistics")
         
-        # Final verification
+        # Final verification (reads the summaries persisted by the update above)
         print("\n=== FINAL VERIFICATION ===")
         cursor.execute("""
-            SELECT d.file_name, 
-                   COUNT(u.id) as units,
-                   SUM(CASE WHEN u.unit_type = 'Occupied' THEN 1 ELSE 0 END) as occupied,
-                   SUM(CASE WHEN u.unit_type = 'Vacant' THEN 1 ELSE 0 END) as vacant,
-                   SUM(u.rent) as total_rent
-            FROM documents d
-            LEFT JOIN units u ON d.id = u.document_id
-            GROUP BY d.id, d.file_name
+            SELECT file_name, total_units, occupied_units, vacant_units, total_rent
+            FROM documents
         """)
         
         total_units = 0
         total_rent = 0
         
-        for row in cursor.fetchall():
-            print(f"📄 {row[0]}: {row[1]} units ({row[2]} occupied, {row[3]} vacant), ${row[4] or 0:.2f} rent")
-            total_units += row[1]
-            total_rent += row[4] or 0
+        for name, n, occ, vac, tr in cursor:
+            print(f"📄 {name}: {n} units ({occ} occupied, {vac} vacant), ${tr or 0:.2f} rent")
+            total_units += n
+            total_rent += tr or 0
         
         print(f"\n🎯 FINAL TOTALS: {total_units} units, ${total_rent:.2f} rent")
         
-        # Check for remaining duplicates
+        # Check for remaining duplicates; the EXISTS probe stops at the first
+        # hit, so the full GROUP BY only runs when there is something to report
         cursor.execute("""
-            SELECT unit_number, COUNT(*) as count
-            FROM units
-            WHERE unit_number != ''
-            GROUP BY unit_number, document_id
-            HAVING count > 1
+            SELECT EXISTS(
+                SELECT 1 FROM units u1
+                JOIN units u2
+                  ON u1.document_id = u2.document_id
+                 AND u1.unit_number = u2.unit_number
+                 AND u1.id < u2.id
+                WHERE u1.unit_number != ''
+            )
         """)
         
-        remaining_dups = cursor.fetchall()
-        if remaining_dups:
+        if cursor.fetchone()[0]:
+            cursor.execute("""
+                SELECT unit_number, COUNT(*) as count
+                FROM units
+                WHERE unit_number != ''
+                GROUP BY unit_number, document_id
+                HAVING count > 1
+            """)
+            remaining_dups = cursor.fetchall()
             print(f"⚠️ Still {len(remaining_dups)} duplicate unit numbers")
         else:
             print("✅ No duplicate units remaining!")
@@ -7,6 +7,9 @@ import sys
 import os
 from pathlib import Path
 
+# Plain text this long already holds the data; skip the heavier extraction methods
+GOOD_ENOUGH_THRESHOLD = 2000
+
 def quick_test():
     """Quick test of the debug tool."""
     print("=== QUICK PDF PARSING TEST ===")
@@ -27,61 +30,70 @@ def quick_test():
         
         try:
             import fitz
-            doc = fitz.open(pdf_path)
-            page = doc[0]
-            
-            # Basic info
-            print(f"Pages: {len(doc)}")
-            print(f"Fonts: {len(page.get_fonts())}")
-            print(f"Is scanned: {len(page.get_fonts()) == 0}")
-            
-            # Try different text extraction methods
-            methods = {
-                "text": lambda: page.get_text("text"),
-                "blocks": lambda: "\n".join([block[4] for block in page.get_text("blocks") if len(block) > 4]),
-                "words": lambda: " ".join([word[4] for word in page.get_text("words")])
-            }
-            
-            best_text = ""
-            best_method = ""
-            
-            for method_name, method_func in methods.items():
-                try:
-                    text = method_func()
-                    print(f"{method_name.upper()}: {len(text)} chars")
-                    
-                    if len(text) > len(best_text):
-                        best_text = text
-                        best_method = method_name
-                        
-                except Exception as e:
-                    print(f"{method_name.upper()}: ERROR - {e}")
-            
-            print(f"\nBest method: {best_method} ({len(best_text)} chars)")
-            
-            if best_text:
-                # Quick pattern tests
-                import re
+            with fitz.open(pdf_path) as doc:
+                page = doc[0]
                 
-                # Unit test
-                unit_matches = re.findall(r'\b(?:01-|02-)?(\d{3})\b', best_text)
-                print(f"Units found: {len(set(unit_matches))} unique")
+                # Basic info
+                print(f"Pages: {len(doc)}")
+                font_count = len(page.get_fonts())
+                is_scanned = font_count == 0
+                print(f"Fonts: {font_count}")
+                print(f"Is scanned: {is_scanned}")
                 
-                # Rent test
-                rent_matches = re.findall(r'1[.,]?[0-9]{3}[.,]?00', best_text)
-                print(f"Rent patterns: {len(rent_matches)} found")
+                # Try different text extraction methods; the heavier ones only
+                # help on likely-scanned pages
+                methods = {
+                    "text": lambda: page.get_text("text"),
+                }
+                if is_scanned:
+                    methods["blocks"] = lambda: "\n".join(block[4] for block in page.get_text("blocks") if len(block) > 4)
+                    methods["words"] = lambda: " ".join([word[4] for word in page.get_text("words")])
                 
-                # Show sample
-                lines = best_text.split('\n')
-                non_empty_lines = [l.strip() for l in lines if l.strip()]
-                print(f"Non-empty lines: {len(non_empty_lines)}")
+                best_text = ""
+                best_method = ""
                 
-                if non_empty_lines:
-                    print("First few lines:")
-                    for i, line in enumerate(non_empty_lines[:3]):
-                        print(f"  {i+1}: {line[:80]}...")
-            
-            doc.close()
+                for method_name, method_func in methods.items():
+                    try:
+                        text = method_func()
+                        print(f"{method_name.upper()}: {len(text)} chars")
+                        
+                        if len(text) > len(best_text):
+                            best_text = text
+                            best_method = method_name
+
+                        # Plain text runs first; stop once it clearly has the data
+                        if len(best_text) > GOOD_ENOUGH_THRESHOLD:
+                            break
+
+                    except Exception as e:
+                        print(f"{method_name.upper()}: ERROR - {e}")
+                
+                print(f"\nBest method: {best_method} ({len(best_text)} chars)")
+                
+                if best_text:
+                    # Quick pattern tests
+                    import re
+                    
+                    # Unit test
+                    unit_matches = re.findall(r'\b(?:01-|02-)?(\d{3})\b', best_text)
+                    print(f"Units found: {len(set(unit_matches))} unique")
+                    
+                    # Rent test
+                    rent_matches = re.findall(r'1[.,]?[0-9]{3}[.,]?00', best_text)
+                    print(f"Rent patterns: {len(rent_matches)} found")
+                    
+                    # Show sample
+                    lines = best_text.split('\n')
+                    non_empty_lines = [l.strip() for l in lines if l.strip()]
+                    print(f"Non-empty lines: {len(non_empty_lines)}")
+                    
+                    if non_empty_lines:
+                        print("First few lines:")
+                        for i, line in enumerate(non_empty_lines[:3]):
+                            print(f"  {i+1}: {line[:80]}...")
+                
+            # Release MuPDF's global object cache between files
+            fitz.TOOLS.store_shrink(100)
             
         except Exception as e:
             print(f"❌ Error processing {pdf_path}: {e}")
@@ -4,12 +4,154 @@ Run this before updating your document_parser.py
 """
 
 import fitz
-import re
-import easyocr
-from PIL import Image
+from functools import lru_cache
 import numpy as np
 
-def test_ocr_extraction():
+# Only needed to mark the model-loading test; the script also runs standalone
+try:
+    import pytest
+    slow = pytest.mark.slow
+except ImportError:
+    slow = lambda func: func
+
+# google-re2 matches in linear time on long OCR strings; optional
+try:
+    import re2 as _re
+except ImportError:
+    import re as _re
+
+class _CleanTable(dict):
+    """str.translate table: keeps word characters, whitespace and $.,-/ and
+    maps everything else to a space; non-ASCII entries are filled on first use"""
+    
+    def __missing__(self, code):
+        char = chr(code)
+        keep = char.isalnum() or char.isspace() or char in '_$.,-/'
+        self[code] = code if keep else 0x20
+        return self[code]
+
+_CLEAN_TABLE = _CleanTable()
+for _code in range(256):  # pre-fill the Latin-1 range
+    _CLEAN_TABLE.__missing__(_code)
+
+# Numba compiles the unit scan below to a native loop; optional
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Hyperscan counts the rent/status/money patterns in one pass; optional
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Units on the rent roll (101-128, 201-227); the set gives O(1) membership
+_EXPECTED_1XX = range(101, 129)
+_EXPECTED_2XX = range(201, 228)
+_EXPECTED = frozenset(_EXPECTED_1XX) | frozenset(_EXPECTED_2XX)
+
+# Patterns used on every OCR run, compiled once
+_UNIT_ANY = _re.compile(r'\b([12]\d{2})\b')
+_RENT = _re.compile(r'\b[1-5]\d{3}\b')
+_STATUS = _re.compile(r'(?i)\b(occupied|vacant|occ|vac)\b')
+_MONEY = _re.compile(r'\$\d+')
+
+def _build_pattern_db():
+    """Hyperscan database for the rent, status and money patterns (ids 0-2)"""
+    if hyperscan is None:
+        return None
+    # Leftmost start offsets let overlapping end-of-match reports be counted once;
+    # \b is ASCII-only here (Hyperscan has no Unicode word boundaries)
+    flags = hyperscan.HS_FLAG_SOM_LEFTMOST
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[rb'\b[1-5]\d{3}\b', rb'\b(?:occupied|vacant|occ|vac)\b', rb'\$\d+'],
+        ids=[0, 1, 2],
+        elements=3,
+        flags=[flags, flags | hyperscan.HS_FLAG_CASELESS, flags],
+    )
+    return db
+
+_PATTERN_DB = _build_pattern_db()
+
+def _record_match(pattern_id, start, end, flags, starts):
+    starts[pattern_id].add(start)
+
+def _scan_units(buf, out):
+    """Write each standalone number 101-128 / 201-227 in the UTF-8 buffer to out;
+    returns how many were written"""
+    count = 0
+    run = 0
+    value = 0
+    digits_only = True
+    n = buf.shape[0]
+    for i in range(n + 1):
+        b = int(buf[i]) if i < n else 32
+        is_digit = 48 <= b <= 57
+        # Cleaned text only keeps non-ASCII letters, so bytes >= 128 are word bytes
+        if is_digit or 65 <= b <= 90 or 97 <= b <= 122 or b == 95 or b >= 128:
+            # Inside a word - accumulate its numeric value while it stays all digits
+            run += 1
+            if is_digit:
+                value = value * 10 + (b - 48)
+            else:
+                digits_only = False
+        else:
+            if run == 3 and digits_only and (101 <= value <= 128 or 201 <= value <= 227):
+                out[count] = value
+                count += 1
+            run = 0
+            value = 0
+            digits_only = True
+    return count
+
+if njit is not None:
+    _scan_units = njit(cache=True)(_scan_units)
+
+# EasyOCR-style text blocks for a few rent roll rows, so the analysis can be
+# tested without loading the OCR models
+_SAMPLE_OCR_BLOCKS = (
+    "Unit Tenant Status Rent Area",
+    "01-101", "John Smith", "Occupied", "$1,450.00", "850",
+    "01-102", "VACANT", "Vacant", "$0.00", "900",
+    "01-128", "Maria Lopez", "Occ", "$1,525.00", "875",
+    "02-201", "Lee Chen", "Occupied", "$1,610.00", "910",
+    "02-227", "VACANT", "Vac", "2,150", "",
+    "Total 329 units", "05/01/2024",
+)
+
+def _ocr_zoom(page, max_zoom=2.0, min_coverage=0.8):
+    """Render zoom for OCR: 2x (144 DPI), but no finer than the resolution of
+    a scan covering most of the page, since upsampling it adds no detail"""
+    # Small images (logos, signatures) on a vector page don't limit the zoom
+    page_area = page.rect.get_area()
+    scans = [info for info in page.get_image_info()
+             if (fitz.Rect(info['bbox']) & page.rect).get_area() >= min_coverage * page_area]
+    if not scans:
+        return max_zoom
+    scan = max(scans, key=lambda info: fitz.Rect(info['bbox']).get_area())
+    native_zoom = scan['width'] / fitz.Rect(scan['bbox']).width
+    return min(max_zoom, max(1.0, native_zoom))
+
+@lru_cache(maxsize=1)
+def _get_reader(lang_list=('en',)):
+    """Load the EasyOCR models once per process"""
+    # Imported here so the transcript test runs without the OCR stack installed
+    import easyocr
+    try:
+        import torch
+        has_cuda = torch.cuda.is_available()
+    except ImportError:
+        has_cuda = False
+    
+    # Run on the GPU when CUDA is available; the fixed page size lets cuDNN
+    # settle on its fastest conv algorithms
+    # quantize=True gives int8 detector/recognizer weights when running on CPU
+    return easyocr.Reader(list(lang_list), gpu=has_cuda, cudnn_benchmark=True, quantize=True)
+
+@slow
+def test_ocr_extraction(ocr_reader):
     """Test OCR extraction on the machine-readable PDF."""
     
     pdf_path = "docs/machine_readable_financial_data.pdf"
@@ -19,74 +161,114 @@ def test_ocr_extraction():
     print("="*50)
     
     # Expected units
-    expected_units = list(range(101, 129)) + list(range(201, 228))  # 55 total
+    expected_units = (*_EXPECTED_1XX, *_EXPECTED_2XX)  # 55 total
     print(f"Expected: {len(expected_units)} units (101-128, 201-227)")
     
-    # Initialize OCR
-    print(f"🔧 Initializing OCR...")
-    reader = easyocr.Reader(['en'], gpu=False)
+    # OCR reader is shared across the test session (see conftest.py)
+    reader = ocr_reader
     
     # Open PDF
     doc = fitz.open(pdf_path)
-    page = doc[0]
     
-    # Convert to image for OCR
-    print(f"🖼️  Converting PDF to image...")
-    zoom = 2.0  # Higher resolution
-    mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat)
+    # Convert every page to an image for OCR
+    print(f"🖼️  Converting PDF to images...")
     
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-    img_array = np.array(img)
+    # The arrays view the pixmap buffers, so the pixmaps stay alive until OCR is done
+    pixmaps = []
+    images = []
+    for page in doc:
+        zoom = _ocr_zoom(page)  # Higher resolution, capped at the scan's own
+        mat = fitz.Matrix(zoom, zoom)
+        # EasyOCR works on grayscale anyway, so render one channel instead of RGB
+        pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY, alpha=False)
+        pixmaps.append(pix)
+        # View MuPDF's sample buffer directly instead of copying it
+        img_array = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width)
+        images.append(img_array)
     
-    print(f"Image size: {img.size}")
+    print(f"Image size: {img_array.shape[1::-1]} x {len(images)} page(s)")
     
-    # Run OCR
+    # Run OCR - same-sized pages go through the detector as one batch
     print(f"🔍 Running OCR...")
-    ocr_results = reader.readtext(img_array, detail=1)
-    ocr_text = " ".join([r[1] for r in ocr_results])
+    if len({img_array.shape for img_array in images}) == 1:
+        height, width = images[0].shape[:2]
+        page_results = reader.readtext_batched(images, n_width=width, n_height=height,
+                                               batch_size=16, detail=1)
+    else:
+        page_results = [reader.readtext(img_array, detail=1) for img_array in images]
+    ocr_results = [r for results in page_results for r in results]
+    images = pixmaps = None
     
-    print(f"OCR extracted: {len(ocr_text)} characters")
+    print(f"OCR extracted: {sum(len(r[1]) for r in ocr_results)} characters")
     print(f"OCR confidence: {len(ocr_results)} text blocks detected")
     
-    # Clean OCR text
-    cleaned_text = re.sub(r'[^\w\s\$\.,\-/]', ' ', ocr_text)
-    cleaned_text = re.sub(r'\s+', ' ', cleaned_text)
+    doc.close()
     
-    print(f"Cleaned text: {len(cleaned_text)} characters")
+    all_found_units, _ = _analyze(r[1] for r in ocr_results)
     
-    # Look for units
-    print(f"\n🎯 SEARCHING FOR UNITS...")
-    
-    unit_patterns = [
-        (r'\b(1[0-2][0-8])\b', "Units 101-128"),
-        (r'\b(20[0-7]|21[0-9]|22[0-7])\b', "Units 201-227"),
-        (r'\b([12]\d{2})\b', "Any 3-digit 1XX/2XX"),
-    ]
+    return len(all_found_units), expected_units
+
+def _find_units(text):
+    """Expected unit numbers appearing as standalone numbers in cleaned text"""
+    if njit is not None:
+        buf = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+        out = np.empty(buf.size // 4 + 1, dtype=np.int16)  # a match takes at least 4 bytes
+        return set(out[:_scan_units(buf, out)].tolist())
+    return {int(match) for match in _UNIT_ANY.findall(text)} & _EXPECTED
+
+def _count_patterns(text):
+    """Rent-like number, status word and dollar amount counts in cleaned text"""
+    if _PATTERN_DB is not None:
+        starts = [set(), set(), set()]
+        _PATTERN_DB.scan(text.encode('utf-8'), match_event_handler=_record_match, context=starts)
+        return tuple(map(len, starts))
+    return len(_RENT.findall(text)), len(_STATUS.findall(text)), len(_MONEY.findall(text))
+
+def _analyze(ocr_blocks):
+    """Clean OCR text blocks one at a time, report the units and data patterns
+    found in them and return the set of expected units present along with
+    the (rent-like, status word, dollar amount) counts"""
     
+    # Blocks are cleaned and scanned as they arrive rather than joined into one
+    # string; patterns never span blocks since the join would add a space anyway
     all_found_units = set()
+    rent_patterns = status_patterns = money_patterns = 0
+    cleaned_length = 0
+    sample_blocks = []  # enough leading text for the 500-char sample
+    first_tokens = []
     
-    for pattern, description in unit_patterns:
-        matches = re.findall(pattern, cleaned_text)
-        valid_units = set()
+    for block in ocr_blocks:
+        tokens = block.translate(_CLEAN_TABLE).split()
+        if not tokens:
+            continue
+        cleaned_block = ' '.join(tokens)
         
-        for match in matches:
-            try:
-                unit_num = int(match)
-                if unit_num in expected_units:
-                    valid_units.add(unit_num)
-                    all_found_units.add(unit_num)
-            except ValueError:
-                continue
+        all_found_units |= _find_units(cleaned_block)
+        rent, status, money = _count_patterns(cleaned_block)
+        rent_patterns += rent
+        status_patterns += status
+        money_patterns += money
         
-        print(f"  {description}: {len(valid_units)} units found")
-        if valid_units:
-            sample = sorted(list(valid_units))[:10]
-            print(f"    Sample: {sample}")
+        if cleaned_length < 500:
+            sample_blocks.append(cleaned_block)
+        if len(first_tokens) < 20:
+            first_tokens.extend(tokens[:20 - len(first_tokens)])
+        cleaned_length += len(cleaned_block) + (1 if cleaned_length else 0)
     
-    # Summary
-    found_100s = [u for u in all_found_units if 101 <= u <= 128]
-    found_200s = [u for u in all_found_units if 201 <= u <= 227]
+    print(f"Cleaned text: {cleaned_length} characters")
+    
+    # Look for units
+    print(f"\n🎯 SEARCHING FOR UNITS...")
+    
+    # Split the ranges with vectorized masks over one sorted array
+    arr = np.sort(np.fromiter(all_found_units, dtype=np.int16, count=len(all_found_units)))
+    found_100s = arr[(arr >= 101) & (arr <= 128)].tolist()
+    found_200s = arr[(arr >= 201) & (arr <= 227)].tolist()
+    
+    for found, description in ((found_100s, "Units 101-128"), (found_200s, "Units 201-227")):
+        print(f"  {description}: {len(found)} units found")
+        if found:
+            print(f"    Sample: {found[:10]}")
     
     print(f"\n📊 EXTRACTION RESULTS:")
     print(f"  Units 101-128: {len(found_100s)}/28 ({len(found_100s)/28*100:.1f}%)")
@@ -95,22 +277,17 @@ def test_ocr_extraction():
     
     # Check for other data patterns
     print(f"\n🔍 OTHER PATTERNS:")
-    rent_patterns = len(re.findall(r'\b[1-5]\d{3}\b', cleaned_text))
-    status_patterns = len(re.findall(r'\b(occupied|vacant|occ|vac)\b', cleaned_text, re.IGNORECASE))
-    money_patterns = len(re.findall(r'\$\d+', cleaned_text))
-    
     print(f"  Rent-like numbers: {rent_patterns}")
     print(f"  Status words: {status_patterns}")
     print(f"  Dollar signs: {money_patterns}")
     
     # Show sample OCR text
     print(f"\n📄 SAMPLE OCR TEXT (first 500 chars):")
-    print(f"   {repr(cleaned_text[:500])}")
+    print(f"   {repr(' '.join(sample_blocks)[:500])}")
     
-    # Show first few lines
-    lines = cleaned_text.split()  # Split by whitespace since OCR doesn't preserve line breaks well
+    # Show first few tokens (OCR doesn't preserve line breaks well)
     print(f"\n📋 FIRST 20 OCR TOKENS:")
-    for i, token in enumerate(lines[:20]):
+    for i, token in enumerate(first_tokens):
         if len(token) > 2:  # Skip very short tokens
             print(f"   {i+1}: {repr(token)}")
     
@@ -131,9 +308,15 @@ def test_ocr_extraction():
         print(f"❌ LOW: {success_rate:.1f}% extraction rate")
         print(f"   OCR approach needs significant work")
     
-    doc.close()
-    
-    return len(all_found_units), expected_units
+    return all_found_units, (rent_patterns, status_patterns, money_patterns)
+
+def test_ocr_analysis_on_transcript():
+    """Test the post-OCR analysis on a canned transcript (no model load)."""
+    found, counts = _analyze(_SAMPLE_OCR_BLOCKS)
+    assert found == {101, 102, 128, 201, 227}
+    # One rent-like number (2024), seven status words, four dollar amounts
+    assert counts == (1, 7, 4)
 
 if __name__ == "__main__":
-    test_ocr_extraction()
\ No newline at end of file
+    print(f"🔧 Initializing OCR...")
+    test_ocr_extraction(_get_reader())
\ No newline at end of file
@@ -7,6 +7,8 @@ import tempfile
 import os
 import sys
 import sqlite3
+import uuid
+import pytest
 from unittest.mock import patch, MagicMock
 
 # Add src to path for imports
@@ -16,9 +18,16 @@ from src.document_parser import DocumentParser
 from src.storage_manager import StorageManager
 from src.query_interface import QueryInterface
 
+def _memory_db():
+    """Shared-cache in-memory database URI plus a connection that keeps it alive"""
+    uri = f"file:{uuid.uuid4().hex}?mode=memory&cache=shared"
+    return uri, sqlite3.connect(uri, uri=True)
+
 class TestDocumentParser(unittest.TestCase):
-    def setUp(self):
-        self.parser = DocumentParser()
+    @classmethod
+    def setUpClass(cls):
+        # The parser loads the OCR model, so build it once per class
+        cls.parser = DocumentParser()
     
     def test_initialization(self):
         """Test parser initialization"""
@@ -41,36 +50,43 @@ class TestDocumentParser(unittest.TestCase):
         self.assertEqual(cleaned[1]['tenant_name'], 'VACANT')
         self.assertEqual(cleaned[1]['unit_type'], 'Vacant')
 
-class TestStorageManager(unittest.TestCase):
-    def setUp(self):
-        # Create temporary database
-        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
-        self.temp_vector_dir = tempfile.mkdtemp()
-        
-        self.storage = StorageManager(
-            db_path=self.temp_db.name,
-            vector_db_path=self.temp_vector_dir
-        )
+@pytest.fixture(scope='class')
+def storage():
+    """In-memory storage shared by a test class; the embedding model loads once per class"""
+    db_uri, db_conn = _memory_db()
+    temp_vector_dir = tempfile.mkdtemp()
     
-    def tearDown(self):
-        # Clean up temporary files
-        os.unlink(self.temp_db.name)
-        import shutil
-        shutil.rmtree(self.temp_vector_dir)
+    yield StorageManager(
+        db_path=db_uri,
+        qdrant_path=temp_vector_dir
+    )
     
-    def test_database_initialization(self):
+    # Clean up temporary files
+    db_conn.close()
+    import shutil
+    shutil.rmtree(temp_vector_dir)
+
+class TestStorageManager:
+    @pytest.fixture(autouse=True)
+    def empty_tables(self, storage):
+        # Each test starts from empty tables
+        with sqlite3.connect(storage.db_path, uri=True) as conn:
+            conn.execute("DELETE FROM units")
+            conn.execute("DELETE FROM documents")
+    
+    def test_database_initialization(self, storage):
         """Test database tables are created properly"""
-        with sqlite3.connect(self.temp_db.name) as conn:
+        with sqlite3.connect(storage.db_path, uri=True) as conn:
             cursor = conn.cursor()
             
             # Check tables exist
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
             tables = [row[0] for row in cursor.fetchall()]
             
-            self.assertIn('documents', tables)
-            self.assertIn('units', tables)
+            assert 'documents' in tables
+            assert 'units' in tables
     
-    def test_store_document(self):
+    def test_store_document(self, storage):
         """Test document storage functionality"""
         test_document = {
             'file_name': 'test.pdf',
@@ -92,16 +108,16 @@ class TestStorageManager(unittest.TestCase):
             'total_area': 850.0
         }
         
-        doc_id = self.storage.store_document(test_document)
-        self.assertIsInstance(doc_id, int)
-        self.assertGreater(doc_id, 0)
+        doc_id = storage.store_document(test_document)
+        assert isinstance(doc_id, int)
+        assert doc_id > 0
         
         # Verify document was stored
-        documents = self.storage.get_all_documents()
-        self.assertEqual(len(documents), 1)
-        self.assertEqual(documents[0]['file_name'], 'test.pdf')
+        with sqlite3.connect(storage.db_path, uri=True) as conn:
+            documents = conn.execute("SELECT id, file_name FROM documents").fetchall()
+        assert documents == [(doc_id, 'test.pdf')]
     
-    def test_property_summary(self):
+    def test_property_summary(self, storage):
         """Test property summary calculation"""
         # Store test document first
         test_document = {
@@ -130,114 +146,100 @@ class TestStorageManager(unittest.TestCase):
             'total_area': 1750.0
         }
         
-        self.storage.store_document(test_document)
+        storage.store_document(test_document)
         
-        summary = self.storage.get_property_summary()
+        summary = storage.get_property_summary()
         
-        self.assertEqual(summary['total_units'], 2)
-        self.assertEqual(summary['occupied_units'], 1)
-        self.assertEqual(summary['vacant_units'], 1)
-        self.assertEqual(summary['total_rent'], 1500.0)
-        self.assertEqual(summary['occupancy_rate'], 50.0)
+        assert summary['total_units'] == 2
+        assert summary['occupied_units'] == 1
+        assert summary['vacant_units'] == 1
+        assert summary['total_rent'] == 1500.0
+        assert summary['occupancy_rate'] == 50.0
 
-class TestQueryInterface(unittest.TestCase):
-    def setUp(self):
-        # Create temporary storage
-        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
-        self.temp_vector_dir = tempfile.mkdtemp()
-        
-        self.storage = StorageManager(
-            db_path=self.temp_db.name,
-            vector_db_path=self.temp_vector_dir
-        )
-        
-        self.query_interface = QueryInterface(self.storage)
-        
-        # Add test data
-        test_document = {
-            'file_name': 'test.pdf',
-            'file_path': '/test/path.pdf',
-            'is_scanned': False,
-            'raw_text': 'Test content',
-            'units': [{
-                'unit': '01-101',
-                'unit_type': 'Occupied',
-                'tenant_name': 'John Doe',
-                'rent': 1500.0,
-                'total_amount': 1500.0,
-                'area_sqft': 850
-            }],
-            'total_units': 1,
-            'occupied_units': 1,
-            'vacant_units': 0,
-            'total_rent': 1500.0,
-            'total_area': 850.0
-        }
-        
-        self.storage.store_document(test_document)
+@pytest.fixture(scope='class')
+def query_interface(storage):
+    """Query interface over one stored test document; the tests only read it"""
+    test_document = {
+        'file_name': 'test.pdf',
+        'file_path': '/test/path.pdf',
+        'is_scanned': False,
+        'raw_text': 'Test content',
+        'units': [{
+            'unit': '01-101',
+            'unit_type': 'Occupied',
+            'tenant_name': 'John Doe',
+            'rent': 1500.0,
+            'total_amount': 1500.0,
+            'area_sqft': 850
+        }],
+        'total_units': 1,
+        'occupied_units': 1,
+        'vacant_units': 0,
+        'total_rent': 1500.0,
+        'total_area': 850.0
+    }
     
-    def tearDown(self):
-        os.unlink(self.temp_db.name)
-        import shutil
-        shutil.rmtree(self.temp_vector_dir)
-    
-    def test_rule_based_queries(self):
+    storage.store_document(test_document)
+    return QueryInterface(storage)
+
+class TestQueryInterface:
+    def test_rule_based_queries(self, query_interface):
         """Test rule-based query processing"""
         # Test total units query
-        result = self.query_interface.process_query("What is the total number of units?")
+        result = query_interface.process_query("What is the total number of units?")
         
-        self.assertIsInstance(result, dict)
-        self.assertIn('answer', result)
-        self.assertIn('confidence', result)
-        self.assertGreater(result['confidence'], 0.5)
-        self.assertIn('1 units', result['answer'])
+        assert isinstance(result, dict)
+        assert 'answer' in result
+        assert 'confidence' in result
+        assert result['confidence'] > 0.5
+        assert '1 units' in result['answer']
     
-    def test_query_patterns(self):
+    @pytest.mark.parametrize('query', [
+        "How many units are occupied?",
+        "What is the total rent?",
+        "Show me the total area",
+        "What is the occupancy rate?"
+    ])
+    def test_query_patterns(self, query_interface, query):
         """Test various query patterns"""
-        test_queries = [
-            "How many units are occupied?",
-            "What is the total rent?",
-            "Show me the total area",
-            "What is the occupancy rate?"
-        ]
-        
-        for query in test_queries:
-            result = self.query_interface.process_query(query)
-            self.assertIsInstance(result, dict)
-            self.assertIn('answer', result)
-            self.assertGreater(len(result['answer']), 0)
+        result = query_interface.process_query(query)
+        assert isinstance(result, dict)
+        assert 'answer' in result
+        assert len(result['answer']) > 0
     
-    def test_suggested_queries(self):
+    def test_suggested_queries(self, query_interface):
         """Test suggested queries functionality"""
-        suggestions = self.query_interface.get_suggested_queries()
+        suggestions = query_interface.get_suggested_queries()
         
-        self.assertIsInstance(suggestions, list)
-        self.assertGreater(len(suggestions), 0)
+        assert isinstance(suggestions, list)
+        assert len(suggestions) > 0
         
         # All suggestions should be strings
         for suggestion in suggestions:
-            self.assertIsInstance(suggestion, str)
-            self.assertGreater(len(suggestion), 0)
+            assert isinstance(suggestion, str)
+            assert len(suggestion) > 0
 
 class TestIntegration(unittest.TestCase):
     """Integration tests for the complete system"""
     
-    def setUp(self):
-        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
-        self.temp_vector_dir = tempfile.mkdtemp()
+    @classmethod
+    def setUpClass(cls):
+        cls.db_uri, cls.db_conn = _memory_db()
+        cls.temp_vector_dir = tempfile.mkdtemp()
         
         # Initialize complete system
-        self.parser = DocumentParser()
-        self.storage = StorageManager(
-            db_path=self.temp_db.name,
-            vector_db_path=self.temp_vector_dir
+        cls.parser = DocumentParser()
+        cls.storage = StorageManager(
+            db_path=cls.db_uri,
+            qdrant_path=cls.temp_vector_dir
         )
-        self.query_interface = QueryInterface(self.storage)
+        cls.query_interface = QueryInterface(cls.storage)
     
-    def tearDown(self):
-        os.unlink(self.temp_db.name)
+    @classmethod
+    def tearDownClass(cls):
+        cls.db_conn.close()
         import shutil
-        shutil.rmtree(self.temp_vector_dir)
+        shutil.rmtree(cls.temp_vector_dir)
     
     @patch('fitz.open')
     def test_end_to_end_processing(self, mock_fitz):
@@ -271,5 +273,5 @@ class TestIntegration(unittest.TestCase):
         self.assertGreater(query_result['confidence'], 0)
 
 if __name__ == '__main__':
-    # Run tests
-    unittest.main(verbosity=2)
\ No newline at end of file
+    # Run tests (pytest also collects the unittest classes)
+    sys.exit(pytest.main([__file__, '-v']))
\ No newline at end of file